@@ -7,7 +7,8 @@ from typing import Optional
 
 from app.api.users import (
     create_user, get_user_by_email,
-    verify_password, create_session, get_user_by_token,
+    verify_password, hash_password, password_needs_rehash, update_user,
+    create_session, get_user_by_token,
     delete_session, get_user_limits
 )
 
@@ -113,6 +114,10 @@ async def login(user_data: UserLogin, response: Response):
     if not verify_password(user_data.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
+    # Migrate legacy/outdated hashes while we hold the plaintext
+    if password_needs_rehash(user['password_hash']):
+        update_user(user['id'], password_hash=hash_password(user_data.password))
+    
     # Create session
     token = create_session(user['id'])
     
@@ -2,33 +2,66 @@
 Unit Price Intelligence Platform - API Routes
 Routes for the flat bids table schema with security hardening
 """
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Request
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Optional, List
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.concurrency import run_in_threadpool
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from itertools import chain
+from functools import lru_cache
+import asyncio
+import hashlib
+import queue
+import time
 import sqlite3
+import threading
+import orjson
 import os
 import io
 
 from app.api.users import (
-    get_user_by_token, check_and_reset_daily_searches, 
+    get_user_by_token, check_and_reset_daily_searches,
     increment_daily_searches, get_user_limits
 )
 
-router = APIRouter()
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson - much faster than stdlib json
+    on the large bid-row payloads returned by the search endpoints"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Rate limiter - will use the one from main.py app state
-limiter = Limiter(key_func=get_remote_address)
+# Shares the same storage backend as main.py so per-route limits are also
+# enforced globally when RATE_LIMIT_STORAGE_URI points at Redis
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"),
+    strategy="moving-window",
+)
 
 
 def get_current_user(request: Request) -> Optional[dict]:
-    """Get current user from session token"""
+    """Get current user from session token, cached for the life of the request
+    so handlers that check limits and then increment counters share one lookup"""
+    if hasattr(request.state, "user"):
+        return request.state.user
+
     token = request.cookies.get("session_token")
-    if not token:
-        return None
-    return get_user_by_token(token)
+    user = get_user_by_token(token) if token else None
+    request.state.user = user
+    return user
 
 
 def check_search_limit(request: Request) -> dict:
@@ -75,98 +108,481 @@ def check_search_limit(request: Request) -> dict:
         'searches_remaining': limits['daily_searches'] - current_searches
     }
 
-router = APIRouter()
-
-def get_db():
-    """Get database connection"""
-    db_path = os.getenv("DATABASE_PATH", "/app/data/idot_intelligence.db")
-    conn = sqlite3.connect(db_path)
+# Resolved once at import - os.getenv is a dict lookup plus string handling
+# and has no business on per-request/per-connection paths
+_DB_PATH = os.getenv("DATABASE_PATH", "/app/data/idot_intelligence.db")
+
+# Process-wide pool of bids-database connections. Reusing a connection keeps
+# SQLite's per-connection page cache and prepared-statement cache warm across
+# requests instead of throwing them away with every conn.close().
+_POOL_SIZE = 8
+_db_pool = queue.Queue(maxsize=_POOL_SIZE)
+_db_pool_created = 0
+_db_pool_lock = threading.Lock()
+
+# The ingest pipeline replaces the database file wholesale at runtime (see
+# DATABASE_UPLOAD.md) - the same premise _data_etag is built on. A pooled
+# connection stays pinned to the inode it opened, so each one is stamped
+# with the file identity it saw and checked against the current file on
+# acquire; stale connections are closed and replaced.
+_conn_generations = {}
+
+def _current_db_generation():
+    """Identity of the database file on disk: changes when ingest swaps in
+    a new file (new inode) or rewrites it in place (new mtime)"""
+    try:
+        st = os.stat(_DB_PATH)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+def _new_pooled_connection():
+    # API traffic only reads the bids database (writes happen in the ingest
+    # pipeline and in ensure_bids_schema at startup), so pool connections
+    # open read-only with a shared cache: no write-lock bookkeeping per
+    # query, one page cache shared across the pool's threads, and query_only
+    # as a belt-and-braces guard. mmap lets the kernel page the file in
+    # directly instead of going through pread.
+    #
+    # The generation is taken before connecting: if the file is replaced in
+    # the gap, the connection is merely recycled once on a later acquire.
+    generation = _current_db_generation()
+    try:
+        conn = sqlite3.connect(
+            f"file:{_DB_PATH}?mode=ro&cache=shared", uri=True, check_same_thread=False
+        )
+    except sqlite3.OperationalError:
+        # Database missing or filesystem rejects ro URIs - open normally
+        conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA query_only=1")
+    except sqlite3.Error:
+        pass
+    _conn_generations[id(conn)] = generation
     return conn
 
+def _discard_stale_connection(conn):
+    """Close a connection opened against a since-replaced database file and
+    free its slot in the pool's allocation count"""
+    global _db_pool_created
+    _conn_generations.pop(id(conn), None)
+    with _db_pool_lock:
+        _db_pool_created -= 1
+    conn.close()
+
+def _acquire_pooled_connection():
+    """Take a connection from the pool, creating one while under the cap and
+    blocking once the pool is fully allocated and busy. Connections pinned
+    to a database file that ingest has since replaced are recycled rather
+    than handed out."""
+    global _db_pool_created
+    current = _current_db_generation()
+    while True:
+        try:
+            conn = _db_pool.get_nowait()
+        except queue.Empty:
+            break
+        if _conn_generations.get(id(conn)) == current:
+            return conn
+        _discard_stale_connection(conn)
+    with _db_pool_lock:
+        if _db_pool_created < _POOL_SIZE:
+            _db_pool_created += 1
+            return _new_pooled_connection()
+    # Pool fully allocated and busy - wait for a connection. One checked out
+    # across a file swap and released afterwards can still surface stale here.
+    while True:
+        conn = _db_pool.get()
+        if _conn_generations.get(id(conn)) == current:
+            return conn
+        _discard_stale_connection(conn)
+        with _db_pool_lock:
+            if _db_pool_created < _POOL_SIZE:
+                _db_pool_created += 1
+                return _new_pooled_connection()
+
+def _release_pooled_connection(conn):
+    try:
+        _db_pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def pooled_db():
+    """Borrow a bids-database connection from the pool for the duration of
+    the with-block; the connection is returned (not closed) afterwards"""
+    conn = _acquire_pooled_connection()
+    try:
+        yield conn
+    finally:
+        _release_pooled_connection(conn)
+
+class _PooledConnectionProxy:
+    """Duck-types sqlite3.Connection for the `conn = get_db() ... conn.close()`
+    call sites: close() hands the underlying connection back to the pool
+    instead of discarding its page and statement caches"""
+    __slots__ = ('_conn',)
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            _release_pooled_connection(conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __del__(self):
+        # Safety net for handlers that error out before close()
+        self.close()
+
+def get_db():
+    """Get database connection, borrowed from the process-wide pool"""
+    return _PooledConnectionProxy(_acquire_pooled_connection())
+
+def close_db_pool():
+    """Close all pooled connections (called at application shutdown)"""
+    global _db_pool_created
+    with _db_pool_lock:
+        while True:
+            try:
+                conn = _db_pool.get_nowait()
+            except queue.Empty:
+                break
+            _conn_generations.pop(id(conn), None)
+            conn.close()
+        _db_pool_created = 0
+
+
+def ensure_bids_schema():
+    """Apply one-time schema upgrades to the bids database.
+
+    Adds an integer letting_year column (backfilled from letting_date) plus a
+    partial index covering the winning-bid pricing queries, so year filters
+    become index range seeks instead of per-row substr/CAST work. Safe to run
+    at every startup; a missing database or table is skipped silently.
+    """
+    try:
+        # The pool hands out read-only connections; schema upgrades need
+        # their own read-write handle (and set WAL here, which persists)
+        conn = sqlite3.connect(_DB_PATH)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='bids'")
+        if not cursor.fetchone():
+            conn.close()
+            return
+
+        cursor.execute("PRAGMA table_info(bids)")
+        columns = {row['name'] for row in cursor.fetchall()}
+        if 'letting_year' not in columns:
+            cursor.execute("ALTER TABLE bids ADD COLUMN letting_year INTEGER")
+
+        cursor.execute("""
+            UPDATE bids
+            SET letting_year = CAST(substr(letting_date, length(letting_date)-3) AS INTEGER)
+            WHERE letting_year IS NULL AND letting_date IS NOT NULL
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bids_item_year_winner
+            ON bids(item_number, letting_year)
+            WHERE is_winner = 'Y' AND unit_price > 0 AND quantity > 0
+        """)
+
+        # Covering partial index for the estimator pricing aggregates: the
+        # filter columns lead, and the aggregated/display columns ride along
+        # so SQLite answers the whole query from the index without touching
+        # the table. Partial because non-winning rows dominate the table.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bids_pricing
+            ON bids(item_number, district, letting_year,
+                    extension, quantity, item_description, unit)
+            WHERE is_winner = 'Y' AND unit_price > 0 AND quantity > 0
+        """)
+
+        cursor.execute("ANALYZE")
+
+        # Close out the implicit transaction the backfill UPDATE opened so
+        # the rebuild below can start its own explicit one
+        conn.commit()
+
+        # The stats row and browse roll-ups are rebuilt inside a single
+        # explicit transaction (SQLite DDL is transactional): readers in
+        # sibling workers see either the old tables or the new ones, never
+        # the window between DROP and CREATE that autocommit would expose.
+        # BEGIN IMMEDIATE also serializes workers racing through startup.
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # One-row roll-up consumed by /api/stats and /api/analytics/summary.
+        # Refreshing it here (every startup, i.e. after each ingest/deploy)
+        # turns those endpoints into single-row fetches instead of repeated
+        # COUNT(DISTINCT) scans over the whole table.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bids_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_rows INTEGER,
+                unique_contracts INTEGER,
+                unique_contractors INTEGER,
+                unique_items INTEGER,
+                unique_counties INTEGER,
+                min_year INTEGER,
+                max_year INTEGER,
+                refreshed_at TEXT
+            )
+        """)
+        cursor.execute("""
+            INSERT OR REPLACE INTO bids_stats
+            SELECT 1,
+                   COUNT(*),
+                   COUNT(DISTINCT contract_number),
+                   COUNT(DISTINCT bidder_name),
+                   COUNT(DISTINCT item_number),
+                   COUNT(DISTINCT CASE WHEN county IS NOT NULL AND county != '' THEN county END),
+                   MIN(letting_year),
+                   MAX(letting_year),
+                   CURRENT_TIMESTAMP
+            FROM bids
+        """)
+
+        # Roll-ups for the browse listings, rebuilt alongside the stats row.
+        # The endpoints then read a handful of pre-aggregated rows instead of
+        # running COUNT(DISTINCT contract_number) over the whole table.
+        cursor.execute("DROP TABLE IF EXISTS bids_by_district")
+        cursor.execute("""
+            CREATE TABLE bids_by_district AS
+            SELECT district, COUNT(DISTINCT contract_number) as contract_count
+            FROM bids
+            WHERE district IS NOT NULL AND district != ''
+            GROUP BY district
+        """)
+        cursor.execute("CREATE UNIQUE INDEX idx_bids_by_district ON bids_by_district(district)")
+
+        cursor.execute("DROP TABLE IF EXISTS bids_by_county")
+        cursor.execute("""
+            CREATE TABLE bids_by_county AS
+            SELECT county, COUNT(DISTINCT contract_number) as contract_count
+            FROM bids
+            WHERE county IS NOT NULL AND county != ''
+            GROUP BY county
+        """)
+        cursor.execute("CREATE UNIQUE INDEX idx_bids_by_county ON bids_by_county(county)")
+
+        conn.commit()
+        conn.close()
+    except sqlite3.Error:
+        # Missing or read-only database - nothing to upgrade
+        pass
+
+
+# Cache headers for endpoints whose output only changes when the ingest
+# pipeline rewrites the database file
+_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+def _data_etag() -> Optional[str]:
+    """Version token for the bids database, derived from file mtime and size.
+    Changes whenever a new Excel upload rewrites the database."""
+    try:
+        st = os.stat(_DB_PATH)
+    except OSError:
+        return None
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+def _cache_validate(request: Request, response: Response) -> Optional[Response]:
+    """Handle conditional GETs: return a 304 response if the client already
+    has the current data version, otherwise tag the response with an ETag"""
+    etag = _data_etag()
+    if not etag:
+        return None
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _CACHE_CONTROL
+    return None
+
 # ============================================================================
 # STATS / ANALYTICS ENDPOINTS
 # ============================================================================
 
+# Server-side TTL cache for the dashboard aggregate endpoints. The ETag layer
+# above only saves bandwidth for clients that revalidate; this saves the
+# COUNT/COUNT DISTINCT scans themselves for every caller inside the window.
+_STATS_TTL = float(os.getenv("STATS_TTL", "60"))
+_stats_cache = {}
+_stats_cache_lock = asyncio.Lock()
+
+async def _cached_stats(name: str, collect) -> dict:
+    """Return the cached payload for `name`, rebuilding it via collect() at
+    most once per TTL window (the lock stops a stampede of rebuilds)"""
+    entry = _stats_cache.get(name)
+    if entry and time.monotonic() - entry[0] < _STATS_TTL:
+        return entry[1]
+    async with _stats_cache_lock:
+        entry = _stats_cache.get(name)
+        if entry and time.monotonic() - entry[0] < _STATS_TTL:
+            return entry[1]
+        # The sqlite3 calls block; run them on a worker thread so a cache
+        # miss doesn't stall every other request on the event loop
+        payload = await run_in_threadpool(collect)
+        _stats_cache[name] = (time.monotonic(), payload)
+        return payload
+
+
+# Cached table listing for the roll-up fallbacks. One sqlite_master lookup
+# per TTL window replaces raising and catching OperationalError on every
+# request against a database whose roll-ups haven't been built. Keyed on
+# the file generation as well: an ingest upload swaps the file out from
+# under the cache, and the replacement may not have the roll-ups at all.
+_tables_cache = {"ts": 0.0, "generation": None, "names": frozenset()}
+
+def _existing_tables(cursor) -> frozenset:
+    now = time.monotonic()
+    generation = _current_db_generation()
+    if (now - _tables_cache["ts"] > _STATS_TTL
+            or generation != _tables_cache["generation"]):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        _tables_cache["names"] = frozenset(row[0] for row in cursor.fetchall())
+        _tables_cache["ts"] = now
+        _tables_cache["generation"] = generation
+    return _tables_cache["names"]
+
+
+# Whether the bids table has the letting_year column ensure_bids_schema
+# adds. Checked once per database-file generation: an ingest upload can
+# swap in a fresh file that hasn't been through the startup upgrade.
+_year_column_cache = {"generation": None, "present": False}
+
+def _has_letting_year(cursor) -> bool:
+    generation = _current_db_generation()
+    if _year_column_cache["generation"] != generation:
+        cursor.execute("PRAGMA table_info(bids)")
+        _year_column_cache["present"] = any(
+            row[1] == 'letting_year' for row in cursor.fetchall()
+        )
+        _year_column_cache["generation"] = generation
+    return _year_column_cache["present"]
+
+
+def _read_bids_stats(cursor):
+    """Fetch the one-row ingest roll-up, or None if it hasn't been built yet
+    (e.g. first boot against a database predating ensure_bids_schema)"""
+    if 'bids_stats' not in _existing_tables(cursor):
+        return None
+    cursor.execute("SELECT * FROM bids_stats WHERE id = 1")
+    return cursor.fetchone()
+
+
 @router.get("/stats")
 @limiter.limit("60/minute")
-async def get_stats(request: Request):
+async def get_stats(request: Request, response: Response):
     """Get overall database statistics"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT COUNT(*) FROM bids")
-    total_bids = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT contract_number) FROM bids")
-    total_contracts = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT bidder_name) FROM bids")
-    total_contractors = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(DISTINCT item_number) FROM bids")
-    total_items = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    return {
-        "total_bids": total_bids,
-        "total_contracts": total_contracts,
-        "total_contractors": total_contractors,
-        "total_items": total_items
-    }
+    not_modified = _cache_validate(request, response)
+    if not_modified:
+        return not_modified
+
+    def collect():
+        conn = get_db()
+        cursor = conn.cursor()
+
+        stats = _read_bids_stats(cursor)
+        if stats:
+            conn.close()
+            return {
+                "total_bids": stats['total_rows'],
+                "total_contracts": stats['unique_contracts'],
+                "total_contractors": stats['unique_contractors'],
+                "total_items": stats['unique_items']
+            }
+
+        # Roll-up not built yet - fall back to live aggregates, computed in
+        # one pass over the table instead of one scan per metric
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                COUNT(DISTINCT contract_number),
+                COUNT(DISTINCT bidder_name),
+                COUNT(DISTINCT item_number)
+            FROM bids
+        """)
+        total_bids, total_contracts, total_contractors, total_items = cursor.fetchone()
+        conn.close()
+
+        return {
+            "total_bids": total_bids,
+            "total_contracts": total_contracts,
+            "total_contractors": total_contractors,
+            "total_items": total_items
+        }
+
+    return await _cached_stats("stats", collect)
 
 
 @router.get("/analytics/summary")
 @limiter.limit("60/minute")
-async def get_analytics_summary(request: Request):
+async def get_analytics_summary(request: Request, response: Response):
     """Get comprehensive analytics summary for dashboard"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Total bid rows
-    cursor.execute("SELECT COUNT(*) FROM bids")
-    total_bid_rows = cursor.fetchone()[0]
-    
-    # Unique contracts
-    cursor.execute("SELECT COUNT(DISTINCT contract_number) FROM bids")
-    unique_contracts = cursor.fetchone()[0]
-    
-    # Unique contractors
-    cursor.execute("SELECT COUNT(DISTINCT bidder_name) FROM bids")
-    unique_contractors = cursor.fetchone()[0]
-    
-    # Unique items
-    cursor.execute("SELECT COUNT(DISTINCT item_number) FROM bids")
-    unique_items = cursor.fetchone()[0]
-    
-    # Unique counties
-    cursor.execute("SELECT COUNT(DISTINCT county) FROM bids WHERE county IS NOT NULL AND county != ''")
-    unique_counties = cursor.fetchone()[0]
-    
-    # Year range
-    cursor.execute("""
-        SELECT 
-            MIN(CAST(substr(letting_date, length(letting_date)-3) AS INTEGER)) as min_year,
-            MAX(CAST(substr(letting_date, length(letting_date)-3) AS INTEGER)) as max_year
-        FROM bids
-        WHERE letting_date IS NOT NULL
-    """)
-    year_row = cursor.fetchone()
-    
-    conn.close()
-    
-    return {
-        "total_bid_rows": total_bid_rows,
-        "unique_contracts": unique_contracts,
-        "unique_contractors": unique_contractors,
-        "unique_items": unique_items,
-        "unique_counties": unique_counties,
-        "year_range": {
-            "min": year_row['min_year'] if year_row else None,
-            "max": year_row['max_year'] if year_row else None
+    not_modified = _cache_validate(request, response)
+    if not_modified:
+        return not_modified
+
+    def collect():
+        conn = get_db()
+        cursor = conn.cursor()
+
+        stats = _read_bids_stats(cursor)
+        if stats:
+            conn.close()
+            return {
+                "total_bid_rows": stats['total_rows'],
+                "unique_contracts": stats['unique_contracts'],
+                "unique_contractors": stats['unique_contractors'],
+                "unique_items": stats['unique_items'],
+                "unique_counties": stats['unique_counties'],
+                "year_range": {
+                    "min": stats['min_year'],
+                    "max": stats['max_year']
+                }
+            }
+
+        # Roll-up not built yet - fall back to live aggregates, computed in
+        # one pass over the table instead of one scan per metric
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                COUNT(DISTINCT contract_number),
+                COUNT(DISTINCT bidder_name),
+                COUNT(DISTINCT item_number),
+                COUNT(DISTINCT CASE WHEN county IS NOT NULL AND county != '' THEN county END),
+                MIN(CAST(substr(letting_date, length(letting_date)-3) AS INTEGER)),
+                MAX(CAST(substr(letting_date, length(letting_date)-3) AS INTEGER))
+            FROM bids
+        """)
+        (total_bid_rows, unique_contracts, unique_contractors, unique_items,
+         unique_counties, min_year, max_year) = cursor.fetchone()
+        conn.close()
+
+        return {
+            "total_bid_rows": total_bid_rows,
+            "unique_contracts": unique_contracts,
+            "unique_contractors": unique_contractors,
+            "unique_items": unique_items,
+            "unique_counties": unique_counties,
+            "year_range": {
+                "min": min_year,
+                "max": max_year
+            }
         }
-    }
+
+    return await _cached_stats("analytics_summary", collect)
 
 
 @router.get("/health")
@@ -186,6 +602,70 @@ async def health_check(request: Request):
 # PAY ITEM SEARCH
 # ============================================================================
 
+# Query text is cached per filter combination so SQLite's per-connection
+# statement cache (which keys on exact SQL text) can actually hit instead of
+# seeing a freshly assembled string on every request
+
+@lru_cache(maxsize=None)
+def _pay_item_queries(has_county: bool, has_district: bool,
+                      has_year_start: bool, has_year_end: bool) -> tuple:
+    """Build the (bids, yearly stats) SQL for a pay-item search filter combo"""
+    query = """
+        SELECT
+            item_number,
+            item_description,
+            contract_number,
+            letting_date,
+            substr(letting_date, length(letting_date)-3) as letting_year,
+            county,
+            district,
+            bidder_name,
+            bidder_rank,
+            is_winner,
+            quantity,
+            unit,
+            unit_price,
+            extension,
+            engineers_est_unit_price,
+            is_low_item,
+            item_rank
+        FROM bids
+        WHERE item_number LIKE ?
+    """
+    if has_county:
+        query += " AND county LIKE ?"
+    if has_district:
+        query += " AND district LIKE ?"
+    if has_year_start:
+        query += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) >= ?"
+    if has_year_end:
+        query += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) <= ?"
+    query += " ORDER BY letting_date DESC, contract_number, bidder_rank LIMIT ?"
+
+    stats_query = """
+        SELECT
+            substr(letting_date, length(letting_date)-3) as year,
+            COUNT(*) as bid_count,
+            SUM(extension) / NULLIF(SUM(quantity), 0) as weighted_avg_price,
+            MIN(unit_price) as min_price,
+            MAX(unit_price) as max_price,
+            SUM(quantity) as total_quantity,
+            SUM(extension) as total_value
+        FROM bids
+        WHERE item_number LIKE ?
+        AND unit_price > 0
+        AND quantity > 0
+        AND is_winner = 'Y'
+    """
+    if has_county:
+        stats_query += " AND county LIKE ?"
+    if has_district:
+        stats_query += " AND district LIKE ?"
+    stats_query += " GROUP BY substr(letting_date, length(letting_date)-3) ORDER BY year"
+
+    return query, stats_query
+
+
 @router.get("/search/pay-item/{item_number}")
 @limiter.limit("30/minute")
 async def search_pay_item(
@@ -218,126 +698,65 @@ async def search_pay_item(
     
     conn = get_db()
     cursor = conn.cursor()
-    
-    # Build query
-    query = """
-        SELECT 
-            item_number,
-            item_description,
-            contract_number,
-            letting_date,
-            substr(letting_date, length(letting_date)-3) as letting_year,
-            county,
-            district,
-            bidder_name,
-            bidder_rank,
-            is_winner,
-            quantity,
-            unit,
-            unit_price,
-            extension,
-            engineers_est_unit_price,
-            is_low_item,
-            item_rank
-        FROM bids
-        WHERE item_number LIKE ?
-    """
+
+    query, stats_query = _pay_item_queries(
+        bool(county), bool(district), bool(year_start), bool(year_end)
+    )
+
     params = [f"%{item_number}%"]
-    
     if county:
-        query += " AND county LIKE ?"
         params.append(f"%{county}%")
-    
     if district:
-        query += " AND district LIKE ?"
         params.append(f"%{district}%")
-    
     if year_start:
-        query += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) >= ?"
         params.append(year_start)
-    
     if year_end:
-        query += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) <= ?"
         params.append(year_end)
-    
-    query += " ORDER BY letting_date DESC, contract_number, bidder_rank LIMIT ?"
     params.append(effective_limit)
-    
+
     cursor.execute(query, params)
-    rows = cursor.fetchall()
-    
+    # The LIMIT above bounds this; the whole result set goes into the JSON
+    # response anyway, so there is nothing to gain from chunked fetching
+    bid_rows = [dict(row) for row in cursor.fetchall()]
+
     # Get yearly statistics with WEIGHTED averages - WINNING BIDS ONLY
-    stats_query = """
-        SELECT 
-            substr(letting_date, length(letting_date)-3) as year,
-            COUNT(*) as bid_count,
-            SUM(extension) / NULLIF(SUM(quantity), 0) as weighted_avg_price,
-            MIN(unit_price) as min_price,
-            MAX(unit_price) as max_price,
-            SUM(quantity) as total_quantity,
-            SUM(extension) as total_value
-        FROM bids
-        WHERE item_number LIKE ?
-        AND unit_price > 0
-        AND quantity > 0
-        AND is_winner = 'Y'
-    """
     stats_params = [f"%{item_number}%"]
-    
     if county:
-        stats_query += " AND county LIKE ?"
         stats_params.append(f"%{county}%")
-    
     if district:
-        stats_query += " AND district LIKE ?"
         stats_params.append(f"%{district}%")
-    
-    stats_query += " GROUP BY substr(letting_date, length(letting_date)-3) ORDER BY year"
-    
+
     cursor.execute(stats_query, stats_params)
     yearly_stats = [dict(row) for row in cursor.fetchall()]
     
-    # Calculate overall weighted average from WINNING BIDS ONLY
-    overall_query = """
-        SELECT 
-            ROUND(SUM(extension) / NULLIF(SUM(quantity), 0), 2) as weighted_avg
-        FROM bids
-        WHERE item_number LIKE ?
-        AND unit_price > 0
-        AND quantity > 0
-        AND is_winner = 'Y'
-    """
-    overall_params = [f"%{item_number}%"]
-    
-    if county:
-        overall_query += " AND county LIKE ?"
-        overall_params.append(f"%{county}%")
-    
-    if district:
-        overall_query += " AND district LIKE ?"
-        overall_params.append(f"%{district}%")
-    
-    if year_start:
-        overall_query += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) >= ?"
-        overall_params.append(year_start)
-    
-    if year_end:
-        overall_query += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) <= ?"
-        overall_params.append(year_end)
-    
-    cursor.execute(overall_query, overall_params)
-    overall_row = cursor.fetchone()
-    overall_weighted_avg = overall_row['weighted_avg'] if overall_row else None
-    
+    # Calculate overall weighted average from the yearly aggregates above -
+    # the per-year totals already cover the same winning-bid slice, so the
+    # only remaining work is one pass over the distinct years
+    total_quantity = 0
+    total_value = 0
+    for year_row in yearly_stats:
+        try:
+            year = int(year_row['year'])
+        except (TypeError, ValueError):
+            continue
+        if year_start and year < year_start:
+            continue
+        if year_end and year > year_end:
+            continue
+        total_quantity += year_row['total_quantity'] or 0
+        total_value += year_row['total_value'] or 0
+
+    overall_weighted_avg = round(total_value / total_quantity, 2) if total_quantity else None
+
     conn.close()
     
     return {
         "item_number": item_number,
         "filters": {"county": county, "district": district, "year_start": year_start, "year_end": year_end},
-        "result_count": len(rows),
+        "result_count": len(bid_rows),
         "overall_weighted_avg": overall_weighted_avg,
         "yearly_trends": yearly_stats,
-        "bids": [dict(row) for row in rows]
+        "bids": bid_rows
     }
 
 
@@ -386,6 +805,54 @@ async def search_pay_item_exact(
 # CONTRACTOR SEARCH
 # ============================================================================
 
+@lru_cache(maxsize=None)
+def _contractor_queries(has_county: bool, has_district: bool,
+                        has_year_start: bool, has_year_end: bool) -> tuple:
+    """Build the (contracts, stats) SQL for a contractor search filter combo"""
+    where_clause = "WHERE bidder_name LIKE ?"
+    if has_county:
+        where_clause += " AND county LIKE ?"
+    if has_district:
+        where_clause += " AND district LIKE ?"
+    if has_year_start:
+        where_clause += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) >= ?"
+    if has_year_end:
+        where_clause += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) <= ?"
+
+    contracts_query = f"""
+        SELECT
+            contract_number,
+            letting_date,
+            county,
+            district,
+            bidder_name,
+            bidder_rank,
+            total_bid_amount,
+            bid_spread_pct,
+            is_winner,
+            COUNT(*) as item_count
+        FROM bids
+        {where_clause}
+        GROUP BY contract_number, bidder_name
+        ORDER BY letting_date DESC
+    """
+
+    stats_query = f"""
+        SELECT
+            bidder_name,
+            COUNT(DISTINCT contract_number) as contracts_bid,
+            COUNT(DISTINCT CASE WHEN is_winner = 'Y' THEN contract_number END) as contracts_won,
+            ROUND(100.0 * COUNT(DISTINCT CASE WHEN is_winner = 'Y' THEN contract_number END) /
+                COUNT(DISTINCT contract_number), 1) as win_rate,
+            ROUND(AVG(bidder_rank), 1) as avg_rank
+        FROM bids
+        {where_clause}
+        GROUP BY bidder_name
+    """
+
+    return contracts_query, stats_query
+
+
 @router.get("/search/contractor/{name}")
 @limiter.limit("30/minute")
 async def search_contractor(
@@ -414,79 +881,35 @@ async def search_contractor(
     
     conn = get_db()
     cursor = conn.cursor()
-    
-    # Build WHERE clause for filters
-    where_clause = "WHERE bidder_name LIKE ?"
+
+    contracts_query, stats_query = _contractor_queries(
+        bool(county), bool(district), bool(year_start), bool(year_end)
+    )
+
     params = [f"%{name}%"]
-    
     if county:
-        where_clause += " AND county LIKE ?"
         params.append(f"%{county}%")
-    
     if district:
-        where_clause += " AND district LIKE ?"
         params.append(f"%{district}%")
-    
     if year_start:
-        where_clause += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) >= ?"
         params.append(year_start)
-    
     if year_end:
-        where_clause += " AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) <= ?"
         params.append(year_end)
-    
+
     # Get contract-level summary (one row per contract)
-    contracts_query = f"""
-        SELECT 
-            contract_number,
-            letting_date,
-            county,
-            district,
-            bidder_name,
-            bidder_rank,
-            total_bid_amount,
-            bid_spread_pct,
-            is_winner,
-            COUNT(*) as item_count
-        FROM bids
-        {where_clause}
-        GROUP BY contract_number, bidder_name
-        ORDER BY letting_date DESC
-    """
-    
     cursor.execute(contracts_query, params)
     contracts = [dict(row) for row in cursor.fetchall()]
-    
+
     # Get win statistics
-    stats_query = f"""
-        SELECT 
-            bidder_name,
-            COUNT(DISTINCT contract_number) as contracts_bid,
-            COUNT(DISTINCT CASE WHEN is_winner = 'Y' THEN contract_number END) as contracts_won,
-            ROUND(100.0 * COUNT(DISTINCT CASE WHEN is_winner = 'Y' THEN contract_number END) / 
-                COUNT(DISTINCT contract_number), 1) as win_rate,
-            ROUND(AVG(bidder_rank), 1) as avg_rank
-        FROM bids
-        {where_clause}
-        GROUP BY bidder_name
-    """
-    
     cursor.execute(stats_query, params)
     stats_rows = cursor.fetchall()
-    
-    # Get total won value separately
-    won_query = f"""
-        SELECT SUM(total_bid_amount) as total_won_value
-        FROM (
-            SELECT DISTINCT contract_number, total_bid_amount
-            FROM bids
-            {where_clause} AND is_winner = 'Y'
-        )
-    """
-    
-    cursor.execute(won_query, params)
-    won_value_row = cursor.fetchone()
-    total_won_value = won_value_row['total_won_value'] if won_value_row and won_value_row['total_won_value'] else 0
+
+    # Total won value - derived from the contract-level rows above instead of
+    # re-scanning the filtered slice with a separate DISTINCT subquery
+    total_won_value = sum(
+        c['total_bid_amount'] for c in contracts
+        if c['is_winner'] == 'Y' and c['total_bid_amount']
+    )
     
     # Calculate "money left on table" for contracts where contractor was #2
     # (How much they would have needed to lower their bid to win)
@@ -955,21 +1378,30 @@ async def search_contract(request: Request, contract_number: str):
     
     conn = get_db()
     cursor = conn.cursor()
-    
+
+    # Hard cap - this query previously had no LIMIT, so a broad LIKE match
+    # could pull the entire table into memory
+    max_rows = 5000
+
     cursor.execute("""
         SELECT *
         FROM bids
         WHERE contract_number LIKE ?
         ORDER BY item_number, bidder_rank
-    """, [f"%{contract_number}%"])
-    
-    rows = cursor.fetchall()
+        LIMIT ?
+    """, [f"%{contract_number}%", max_rows + 1])
+
+    bids = [dict(row) for row in cursor.fetchall()]
     conn.close()
-    
-    if not rows:
+
+    if not bids:
         raise HTTPException(status_code=404, detail="Contract not found")
-    
-    bids = [dict(row) for row in rows]
+
+    if len(bids) > max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Contract search matched more than {max_rows} bid rows. Please use a more specific contract number."
+        )
     
     # Organize by item for comparison view
     items_comparison = {}
@@ -1301,18 +1733,26 @@ async def browse_contracts(
 
 @router.get("/browse/districts")
 @limiter.limit("60/minute")
-async def browse_districts(request: Request):
+async def browse_districts(request: Request, response: Response):
     """Get list of all districts"""
+    not_modified = _cache_validate(request, response)
+    if not_modified:
+        return not_modified
+
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT DISTINCT district, COUNT(DISTINCT contract_number) as contract_count
-        FROM bids
-        WHERE district IS NOT NULL AND district != ''
-        GROUP BY district
-        ORDER BY district
-    """)
+    if 'bids_by_district' in _existing_tables(cursor):
+        cursor.execute("SELECT district, contract_count FROM bids_by_district ORDER BY district")
+    else:
+        # Roll-up not built yet - aggregate live
+        cursor.execute("""
+            SELECT DISTINCT district, COUNT(DISTINCT contract_number) as contract_count
+            FROM bids
+            WHERE district IS NOT NULL AND district != ''
+            GROUP BY district
+            ORDER BY district
+        """)
     
     rows = cursor.fetchall()
     conn.close()
@@ -1324,18 +1764,26 @@ async def browse_districts(request: Request):
 
 @router.get("/browse/counties")
 @limiter.limit("60/minute")
-async def browse_counties(request: Request):
+async def browse_counties(request: Request, response: Response):
     """Get list of all counties"""
+    not_modified = _cache_validate(request, response)
+    if not_modified:
+        return not_modified
+
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT DISTINCT county, COUNT(DISTINCT contract_number) as contract_count
-        FROM bids
-        WHERE county IS NOT NULL AND county != ''
-        GROUP BY county
-        ORDER BY county
-    """)
+    if 'bids_by_county' in _existing_tables(cursor):
+        cursor.execute("SELECT county, contract_count FROM bids_by_county ORDER BY county")
+    else:
+        # Roll-up not built yet - aggregate live
+        cursor.execute("""
+            SELECT DISTINCT county, COUNT(DISTINCT contract_number) as contract_count
+            FROM bids
+            WHERE county IS NOT NULL AND county != ''
+            GROUP BY county
+            ORDER BY county
+        """)
     
     rows = cursor.fetchall()
     conn.close()
@@ -1349,167 +1797,262 @@ async def browse_counties(request: Request):
 # ESTIMATOR EXCEL UPLOAD
 # ============================================================================
 
-@router.post("/estimator/price-items")
-@limiter.limit("10/minute")
-async def price_items_from_excel(
-    request: Request,
-    file: UploadFile = File(...),
-    districts: str = Form(default=""),
-    year_start: Optional[int] = Form(default=None),
-    year_end: Optional[int] = Form(default=None)
-):
-    """
-    Upload an Excel file with item numbers and quantities.
-    Returns the file with weighted average prices filled in.
-    
-    PRO FEATURE - requires active subscription.
-    
-    Expected Excel format:
-    - Column A: Item Number (required)
-    - Column B: Item Description (will be filled if empty)
-    - Column C: Quantity (required for extension calc)
-    - Column D: Unit (will be filled if empty)
-    - Column E: Unit Price (will be filled by system)
-    - Column F: Extension (will be calculated)
-    
-    Limited to 300 items to prevent bulk data extraction.
+# Shared style objects for the openpyxl template builder - style construction
+# is expensive, so build each Font/Fill/Alignment once and reuse the
+# references across cells and requests (built lazily because openpyxl itself
+# is imported lazily inside the handlers). The priced-output path registers
+# its formats once per workbook through xlsxwriter instead.
+_XLSX_STYLES = None
+
+def _xlsx_styles() -> dict:
+    global _XLSX_STYLES
+    if _XLSX_STYLES is None:
+        from openpyxl.styles import Font, PatternFill, Alignment
+        _XLSX_STYLES = {
+            'header_fill': PatternFill(start_color="1E3A5F", end_color="1E3A5F", fill_type="solid"),
+            'header_font': Font(color="FFFFFF", bold=True),
+            'header_alignment': Alignment(horizontal='center'),
+            'bold_font': Font(bold=True),
+        }
+    return _XLSX_STYLES
+
+
+@lru_cache(maxsize=64)
+def _pricing_sql(n_pairs: int, n_districts: int, has_year_start: bool, has_year_end: bool,
+                 has_year_column: bool = True) -> str:
+    """Assembled pricing SQL for one request shape (item count and filters).
+
+    Returning the identical string object for repeated shapes lets sqlite3's
+    per-connection statement cache reuse the prepared plan instead of
+    re-parsing the query text on every upload."""
+    values_sql = ','.join(['(?,?)'] * n_pairs)
+    district_clause = ""
+    if n_districts:
+        district_clause = f" AND b.district IN ({','.join(['?'] * n_districts)})"
+    # A database swapped in by ingest may not have been through
+    # ensure_bids_schema yet; fall back to deriving the year from
+    # letting_date until the column exists
+    if has_year_column:
+        year_expr = "b.letting_year"
+    else:
+        year_expr = "CAST(substr(b.letting_date, length(b.letting_date)-3) AS INTEGER)"
+    year_clause = ""
+    if has_year_start:
+        year_clause += f" AND {year_expr} >= ?"
+    if has_year_end:
+        year_clause += f" AND {year_expr} <= ?"
+    return f"""
+        WITH req(item_number, qty) AS (VALUES {values_sql})
+        SELECT
+            req.item_number,
+            req.qty,
+            MAX(b.item_description) as item_description,
+            MAX(b.unit) as unit,
+            SUM(b.extension) / NULLIF(SUM(b.quantity), 0) as weighted_avg_price,
+            ROUND(SUM(b.extension) / NULLIF(SUM(b.quantity), 0) * req.qty, 2) as extension,
+            COUNT(b.item_number) as bid_count
+        FROM req
+        LEFT JOIN bids b ON b.item_number = req.item_number
+            AND b.is_winner = 'Y'
+            AND b.unit_price > 0
+            AND b.quantity > 0
+            {district_clause}
+            {year_clause}
+        GROUP BY req.item_number, req.qty
     """
-    # Check if user has Pro access
-    user = get_current_user(request)
-    if not user:
-        raise HTTPException(
-            status_code=401, 
-            detail="Please log in to use the Estimator Tool"
-        )
-    
-    limits = get_user_limits(user)
-    if not limits['estimator_access']:
-        raise HTTPException(
-            status_code=403, 
-            detail="The Estimator Tool requires a Pro subscription. Start your 7-day free trial today!"
-        )
-    
+
+
+def _build_priced_xlsx(spool, upload_filename, districts, year_start, year_end):
+    """Parse the uploaded sheet, price its items, and serialize the priced
+    workbook. CPU-bound by design - the route runs it in a worker thread."""
     import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
-    
-    # Read the uploaded file - support both .xls and .xlsx
+    import xlsxwriter
+
+    # Read the uploaded file - support both .xls and .xlsx.
+    # For .xlsx, read_only/data_only streams row tuples out of the XML instead
+    # of building the full workbook object graph; we only need columns A-D.
     try:
-        contents = await file.read()
-        filename_lower = (file.filename or '').lower()
-        
+        filename_lower = (upload_filename or '').lower()
+
+        wb_in = None
         if filename_lower.endswith('.xls') and not filename_lower.endswith('.xlsx'):
-            # Old Excel format - use xlrd to read, then convert to openpyxl
+            # Old Excel format - harvest rows with xlrd
             import xlrd
-            xls_book = xlrd.open_workbook(file_contents=contents)
+            xls_book = xlrd.open_workbook(file_contents=spool.read())
             xls_sheet = xls_book.sheet_by_index(0)
-            
-            # Create new openpyxl workbook with the data
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            
-            for row_idx in range(xls_sheet.nrows):
-                for col_idx in range(xls_sheet.ncols):
-                    cell_value = xls_sheet.cell_value(row_idx, col_idx)
-                    cell_type = xls_sheet.cell_type(row_idx, col_idx)
-                    
-                    # xlrd cell types: 0=empty, 1=text, 2=number, 3=date, 4=boolean, 5=error
-                    # For column A (item numbers), convert numbers to strings without decimals
-                    if col_idx == 0 and cell_type == 2 and cell_value:  # Number type in column A
-                        # Convert float to int string (e.g., 20200100.0 -> "20200100")
-                        cell_value = str(int(cell_value))
-                    
-                    ws.cell(row=row_idx + 1, column=col_idx + 1, value=cell_value)
+
+            def _xls_rows():
+                for row_idx in range(xls_sheet.nrows):
+                    row_values = []
+                    for col_idx in range(min(xls_sheet.ncols, 4)):
+                        cell_value = xls_sheet.cell_value(row_idx, col_idx)
+                        cell_type = xls_sheet.cell_type(row_idx, col_idx)
+
+                        # xlrd cell types: 0=empty, 1=text, 2=number, 3=date, 4=boolean, 5=error
+                        # For column A (item numbers), convert numbers to strings without decimals
+                        if col_idx == 0 and cell_type == 2 and cell_value:  # Number type in column A
+                            # Convert float to int string (e.g., 20200100.0 -> "20200100")
+                            cell_value = str(int(cell_value))
+
+                        row_values.append(cell_value if cell_value != '' else None)
+                    yield row_values
+
+            row_iter = _xls_rows()
         else:
-            # New Excel format (.xlsx)
-            wb = openpyxl.load_workbook(io.BytesIO(contents))
-            ws = wb.active
+            # New Excel format (.xlsx) - iter_rows under read_only yields value
+            # tuples straight from the parsed XML without building Cell objects
+            wb_in = openpyxl.load_workbook(spool, read_only=True, data_only=True)
+            row_iter = wb_in.active.iter_rows(max_col=4, values_only=True)
+
+        # Peek at the first row once to decide whether it is a header; the
+        # rest of the sheet streams through the collection loop below
+        first_row = next(row_iter, None)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not read Excel file: {str(e)}")
-    
+
     # Parse districts
     district_list = [d.strip() for d in districts.split(',') if d.strip()] if districts else []
-    
-    # Find header row and data start
-    header_row = 1
-    data_start = 2
-    
+
     # Check if first row looks like headers
-    first_cell = str(ws.cell(row=1, column=1).value or "").lower()
+    first_cell = str(first_row[0] or "").lower() if first_row and first_row[0] else ""
     if 'item' in first_cell or 'number' in first_cell or 'code' in first_cell:
-        header_row = 1
-        data_start = 2
-    else:
+        data_rows = row_iter
+    elif first_row is not None:
         # No header, data starts at row 1
-        header_row = 0
-        data_start = 1
-    
+        data_rows = chain([first_row], row_iter)
+    else:
+        data_rows = row_iter
+
     # Collect item numbers from column A
     items_to_price = []
-    row = data_start
-    while row <= ws.max_row and len(items_to_price) < 300:
-        item_num = ws.cell(row=row, column=1).value
-        if item_num:
-            # Handle various formats: floats, ints, strings
-            if isinstance(item_num, float):
-                # Convert float to int string (e.g., 20200100.0 -> "20200100")
-                item_num = str(int(item_num))
-            else:
-                item_num = str(item_num).strip()
-            
-            # Remove any trailing .0 that might be left
-            if item_num.endswith('.0'):
-                item_num = item_num[:-2]
-            
-            if item_num:
-                # Ensure uppercase for consistent matching
-                item_num = item_num.upper()
-                
-                quantity = ws.cell(row=row, column=3).value
-                try:
-                    quantity = float(quantity) if quantity else 0
-                except:
-                    quantity = 0
-                items_to_price.append({
-                    'row': row,
-                    'item_number': item_num,
-                    'quantity': quantity
-                })
-        row += 1
-    
+    for row_values in data_rows:
+        item_num = row_values[0] if row_values else None
+        if not item_num:
+            continue
+
+        # Handle various formats: floats, ints, strings
+        if isinstance(item_num, float):
+            # Convert float to int string (e.g., 20200100.0 -> "20200100")
+            item_num = str(int(item_num))
+        else:
+            item_num = str(item_num).strip()
+
+        # Remove any trailing .0 that might be left
+        if item_num.endswith('.0'):
+            item_num = item_num[:-2]
+
+        if not item_num:
+            continue
+
+        if len(items_to_price) >= 300:
+            # More than 300 items
+            raise HTTPException(
+                status_code=400,
+                detail="File contains more than 300 items. Please limit to 300 items per upload."
+            )
+
+        quantity = row_values[2] if len(row_values) > 2 else None
+        try:
+            quantity = float(quantity) if quantity else 0
+        except:
+            quantity = 0
+
+        items_to_price.append({
+            # Ensure uppercase for consistent matching
+            'item_number': item_num.upper(),
+            'description': row_values[1] if len(row_values) > 1 else None,
+            'quantity': quantity,
+            'unit': row_values[3] if len(row_values) > 3 else None
+        })
+
+    if wb_in is not None:
+        wb_in.close()
+
     if len(items_to_price) == 0:
         raise HTTPException(status_code=400, detail="No item numbers found in column A")
     
-    if row <= ws.max_row:
-        # More than 300 items
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File contains more than 300 items. Please limit to 300 items per upload. Found items up to row {row}."
-        )
-    
-    # Get pricing from database
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Build WHERE clause for districts and years
-    district_clause = ""
-    year_clause = ""
-    
-    if district_list:
-        placeholders = ','.join(['?' for _ in district_list])
-        district_clause = f" AND district IN ({placeholders})"
-    
+    year_params = []
     if year_start:
-        year_clause += f" AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) >= {year_start}"
+        year_params.append(year_start)
     if year_end:
-        year_clause += f" AND CAST(substr(letting_date, length(letting_date)-3) AS INTEGER) <= {year_end}"
+        year_params.append(year_end)
     
     # Check if any filters are applied
     has_filters = bool(district_list or year_start or year_end)
-    
-    # Define highlight fill for fallback items
-    fallback_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-    
+
+    # Price all items in two batched queries (one per filter mode) instead of
+    # one or two SELECTs per item - the loop below then does dict lookups.
+    # Joining against a VALUES CTE of (item_number, qty) pairs lets SQLite
+    # compute the rounded extension in the same aggregate pass.
+    request_pairs = sorted({(item['item_number'], item['quantity']) for item in items_to_price})
+    req_params = [value for pair in request_pairs for value in pair]
+
+    market_query = _pricing_sql(len(request_pairs), 0, False, False)
+
+    # Get pricing from database
+    with pooled_db() as conn:
+        cursor = conn.cursor()
+        # Plain tuples instead of sqlite3.Row - the loop below unpacks
+        # positionally rather than hashing column names per access
+        cursor.row_factory = None
+
+        cursor.execute(market_query, req_params)
+        market_results = {
+            (item_num, qty): (desc, unit, price, ext, cnt)
+            for item_num, qty, desc, unit, price, ext, cnt in cursor.fetchall()
+        }
+
+        filtered_results = {}
+        if has_filters:
+            filtered_query = _pricing_sql(
+                len(request_pairs), len(district_list), bool(year_start), bool(year_end),
+                has_year_column=_has_letting_year(cursor)
+            )
+
+            params = list(req_params)
+            if district_list:
+                params.extend(district_list)
+            params.extend(year_params)
+
+            cursor.execute(filtered_query, params)
+            filtered_results = {
+                (item_num, qty): (desc, unit, price, ext, cnt)
+                for item_num, qty, desc, unit, price, ext, cnt in cursor.fetchall()
+            }
+
+    # Serialize with xlsxwriter - formats are registered once on the
+    # workbook and rows are written by index, so no per-cell Python objects
+    # are built; constant_memory streams finished rows out as it goes
+    output = io.BytesIO()
+    wb = xlsxwriter.Workbook(output, {'in_memory': True, 'constant_memory': True})
+    ws = wb.add_worksheet('Estimate')
+
+    ws.set_column(0, 0, 15)
+    ws.set_column(1, 1, 40)
+    ws.set_column(2, 2, 12)
+    ws.set_column(3, 3, 10)
+    ws.set_column(4, 6, 14)
+    ws.set_column(7, 7, 12)
+    ws.set_column(8, 8, 22)
+
+    header_fmt = wb.add_format({
+        'bg_color': '#1E3A5F', 'font_color': '#FFFFFF', 'bold': True, 'align': 'center'
+    })
+    money_fmt = wb.add_format({'num_format': '$#,##0.00'})
+    # Yellow variants mark items priced from the unfiltered market average
+    money_fallback_fmt = wb.add_format({'num_format': '$#,##0.00', 'bg_color': '#FFFF00'})
+    fallback_fmt = wb.add_format({'bg_color': '#FFFF00'})
+    not_found_fmt = wb.add_format({'font_color': '#FF0000', 'italic': True})
+    bold_fmt = wb.add_format({'bold': True})
+
+    # Headers
+    if has_filters:
+        headers = ['Item Number', 'Description', 'Quantity', 'Unit', 'Market Avg', 'Filtered Avg', 'Extension', 'Bid Count', 'Source']
+    else:
+        headers = ['Item Number', 'Description', 'Quantity', 'Unit', 'Market Avg', 'Unit Price', 'Extension', 'Bid Count', 'Source']
+
+    ws.write_row(0, 0, headers, header_fmt)
+
     # Price each item
     results_summary = {
         'items_requested': len(items_to_price),
@@ -1518,217 +2061,184 @@ async def price_items_from_excel(
         'items_from_fallback': 0,
         'total_value': 0
     }
-    
+
+    no_result = (None, None, None, None, 0)
+    row_idx = 1
+
     for item in items_to_price:
-        row_num = item['row']
-        
-        # FIRST: Always get unfiltered market average
-        market_query = """
-            SELECT 
-                item_number,
-                item_description,
-                unit,
-                SUM(extension) / NULLIF(SUM(quantity), 0) as weighted_avg_price,
-                COUNT(*) as bid_count
-            FROM bids
-            WHERE item_number = ?
-            AND unit_price > 0
-            AND quantity > 0
-            AND is_winner = 'Y'
-            GROUP BY item_number
-        """
-        
-        cursor.execute(market_query, [item['item_number']])
-        market_result = cursor.fetchone()
-        
-        # SECOND: If filters applied, get filtered average
-        filtered_result = None
-        if has_filters:
-            filtered_query = f"""
-                SELECT 
-                    item_number,
-                    item_description,
-                    unit,
-                    SUM(extension) / NULLIF(SUM(quantity), 0) as weighted_avg_price,
-                    COUNT(*) as bid_count
-                FROM bids
-                WHERE item_number = ?
-                AND unit_price > 0
-                AND quantity > 0
-                AND is_winner = 'Y'
-                {district_clause}
-                {year_clause}
-                GROUP BY item_number
-            """
-            
-            params = [item['item_number']]
-            if district_list:
-                params.extend(district_list)
-            
-            cursor.execute(filtered_query, params)
-            filtered_result = cursor.fetchone()
-        
-        # Determine which price to use
-        market_price = market_result['weighted_avg_price'] if market_result else None
-        filtered_price = filtered_result['weighted_avg_price'] if filtered_result else None
-        
-        # Get description and unit from whatever result we have
-        description = None
-        unit = None
-        if filtered_result:
-            description = filtered_result['item_description']
-            unit = filtered_result['unit']
-        elif market_result:
-            description = market_result['item_description']
-            unit = market_result['unit']
-        
+        pair = (item['item_number'], item['quantity'])
+        m_desc, m_unit, market_price, m_ext, m_count = market_results.get(pair, no_result)
+        f_desc, f_unit, filtered_price, f_ext, f_count = \
+            filtered_results.get(pair, no_result) if has_filters else no_result
+
+        # Fill in description and unit from the database when the upload left them blank
+        description = item['description'] or f_desc or m_desc
+        unit = item['unit'] or f_unit or m_unit
+
+        ws.write(row_idx, 0, item['item_number'])
+        ws.write(row_idx, 1, description)
+        ws.write(row_idx, 2, item['quantity'] or None)
+        ws.write(row_idx, 3, unit)
+
         if market_price:
-            # Fill in description and unit
-            if not ws.cell(row=row_num, column=2).value and description:
-                ws.cell(row=row_num, column=2).value = description
-            
-            if not ws.cell(row=row_num, column=4).value and unit:
-                ws.cell(row=row_num, column=4).value = unit
-            
             # Column E: Market Avg (always, no filters)
-            ws.cell(row=row_num, column=5).value = round(market_price, 2)
-            ws.cell(row=row_num, column=5).number_format = '$#,##0.00'
-            
+            ws.write_number(row_idx, 4, round(market_price, 2), money_fmt)
+
             if has_filters:
-                # Column F: Filtered Avg (or fallback)
+                # Column F: Filtered Avg (or fallback, highlighted yellow)
                 if filtered_price:
-                    # Use filtered price
                     used_price = filtered_price
-                    ws.cell(row=row_num, column=6).value = round(filtered_price, 2)
-                    ws.cell(row=row_num, column=8).value = filtered_result['bid_count']
-                    ws.cell(row=row_num, column=9).value = "Filtered"
+                    price_fmt = money_fmt
+                    bid_count = f_count
+                    extension = f_ext or 0
+                    source = "Filtered"
                 else:
-                    # Fallback to market price - highlight yellow
                     used_price = market_price
-                    ws.cell(row=row_num, column=6).value = round(market_price, 2)
-                    ws.cell(row=row_num, column=6).fill = fallback_fill
-                    ws.cell(row=row_num, column=8).value = market_result['bid_count']
-                    ws.cell(row=row_num, column=9).value = "Market (No Filter Data)"
-                    ws.cell(row=row_num, column=9).fill = fallback_fill
+                    price_fmt = money_fallback_fmt
+                    bid_count = m_count
+                    extension = m_ext or 0
+                    source = "Market (No Filter Data)"
                     results_summary['items_from_fallback'] += 1
-                
-                ws.cell(row=row_num, column=6).number_format = '$#,##0.00'
-                
-                # Column G: Extension (using filtered/fallback price)
-                extension = used_price * item['quantity'] if item['quantity'] else 0
-                ws.cell(row=row_num, column=7).value = round(extension, 2)
-                ws.cell(row=row_num, column=7).number_format = '$#,##0.00'
-                if not filtered_price:
-                    ws.cell(row=row_num, column=7).fill = fallback_fill
+
+                ws.write_number(row_idx, 5, round(used_price, 2), price_fmt)
+
+                # Column G: Extension (computed in SQL from the filtered/fallback price)
+                ws.write_number(row_idx, 6, round(extension, 2), price_fmt)
+
+                # Columns H/I: bid count and source
+                ws.write_number(row_idx, 7, bid_count)
+                ws.write(row_idx, 8, source,
+                         fallback_fmt if price_fmt is money_fallback_fmt else None)
             else:
                 # No filters - just use market price
-                used_price = market_price
-                extension = used_price * item['quantity'] if item['quantity'] else 0
-                
-                # Column F: Same as market (no filters)
-                ws.cell(row=row_num, column=6).value = round(market_price, 2)
-                ws.cell(row=row_num, column=6).number_format = '$#,##0.00'
-                
-                # Column G: Extension
-                ws.cell(row=row_num, column=7).value = round(extension, 2)
-                ws.cell(row=row_num, column=7).number_format = '$#,##0.00'
-                
-                # Column H: Bid count
-                ws.cell(row=row_num, column=8).value = market_result['bid_count']
-                
-                # Column I: Source
-                ws.cell(row=row_num, column=9).value = "Market"
-            
+                extension = m_ext or 0
+                ws.write_number(row_idx, 5, round(market_price, 2), money_fmt)
+                ws.write_number(row_idx, 6, round(extension, 2), money_fmt)
+                ws.write_number(row_idx, 7, m_count)
+                ws.write(row_idx, 8, "Market")
+
             results_summary['items_priced'] += 1
             results_summary['total_value'] += extension
         else:
             # Item not found at all
-            ws.cell(row=row_num, column=5).value = "NOT FOUND"
-            ws.cell(row=row_num, column=5).font = Font(color="FF0000", italic=True)
-            ws.cell(row=row_num, column=6).value = "NOT FOUND"
-            ws.cell(row=row_num, column=6).font = Font(color="FF0000", italic=True)
+            ws.write(row_idx, 4, "NOT FOUND", not_found_fmt)
+            ws.write(row_idx, 5, "NOT FOUND", not_found_fmt)
             results_summary['items_not_found'] += 1
-    
-    conn.close()
-    
-    # Add/update headers
-    if has_filters:
-        headers = ['Item Number', 'Description', 'Quantity', 'Unit', 'Market Avg', 'Filtered Avg', 'Extension', 'Bid Count', 'Source']
-    else:
-        headers = ['Item Number', 'Description', 'Quantity', 'Unit', 'Market Avg', 'Unit Price', 'Extension', 'Bid Count', 'Source']
-    
-    header_fill = PatternFill(start_color="1E3A5F", end_color="1E3A5F", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col)
-        cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Add summary at bottom
-    summary_row = ws.max_row + 2
-    ws.cell(row=summary_row, column=1).value = "PRICING SUMMARY"
-    ws.cell(row=summary_row, column=1).font = Font(bold=True)
-    
-    ws.cell(row=summary_row + 1, column=1).value = "Items Requested:"
-    ws.cell(row=summary_row + 1, column=2).value = results_summary['items_requested']
-    
-    ws.cell(row=summary_row + 2, column=1).value = "Items Priced:"
-    ws.cell(row=summary_row + 2, column=2).value = results_summary['items_priced']
-    
-    ws.cell(row=summary_row + 3, column=1).value = "Items Not Found:"
-    ws.cell(row=summary_row + 3, column=2).value = results_summary['items_not_found']
-    
+
+        row_idx += 1
+
+    # Add summary at bottom (blank spacer row first)
+    row_idx += 1
+    ws.write(row_idx, 0, "PRICING SUMMARY", bold_fmt)
+    ws.write(row_idx + 1, 0, "Items Requested:")
+    ws.write_number(row_idx + 1, 1, results_summary['items_requested'])
+    ws.write(row_idx + 2, 0, "Items Priced:")
+    ws.write_number(row_idx + 2, 1, results_summary['items_priced'])
+    ws.write(row_idx + 3, 0, "Items Not Found:")
+    ws.write_number(row_idx + 3, 1, results_summary['items_not_found'])
+    row_idx += 4
+
     if has_filters:
-        ws.cell(row=summary_row + 4, column=1).value = "Items Using Market Fallback:"
-        ws.cell(row=summary_row + 4, column=2).value = results_summary['items_from_fallback']
-        ws.cell(row=summary_row + 4, column=2).fill = fallback_fill
-        
-        ws.cell(row=summary_row + 5, column=1).value = "Total Estimated Value:"
-        ws.cell(row=summary_row + 5, column=2).value = results_summary['total_value']
-        ws.cell(row=summary_row + 5, column=2).number_format = '$#,##0.00'
-        
-        ws.cell(row=summary_row + 7, column=1).value = "Filters Applied:"
-        ws.cell(row=summary_row + 7, column=1).font = Font(bold=True)
+        ws.write(row_idx, 0, "Items Using Market Fallback:")
+        ws.write_number(row_idx, 1, results_summary['items_from_fallback'], fallback_fmt)
+        ws.write(row_idx + 1, 0, "Total Estimated Value:")
+        ws.write_number(row_idx + 1, 1, round(results_summary['total_value'], 2), money_fmt)
+        ws.write(row_idx + 3, 0, "Filters Applied:", bold_fmt)
+        row_idx += 4
         if district_list:
-            ws.cell(row=summary_row + 8, column=1).value = f"Districts: {', '.join(district_list)}"
+            ws.write(row_idx, 0, f"Districts: {', '.join(district_list)}")
+            row_idx += 1
         if year_start or year_end:
             year_range = f"{year_start or 'Any'} - {year_end or 'Any'}"
-            ws.cell(row=summary_row + 9, column=1).value = f"Years: {year_range}"
+            ws.write(row_idx, 0, f"Years: {year_range}")
     else:
-        ws.cell(row=summary_row + 4, column=1).value = "Total Estimated Value:"
-        ws.cell(row=summary_row + 4, column=2).value = results_summary['total_value']
-        ws.cell(row=summary_row + 4, column=2).number_format = '$#,##0.00'
-    
-    # Adjust column widths for new layout
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 40
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 10
-    ws.column_dimensions['E'].width = 14
-    ws.column_dimensions['F'].width = 14
-    ws.column_dimensions['G'].width = 14
-    ws.column_dimensions['H'].width = 12
-    ws.column_dimensions['I'].width = 22
-    
-    # Save to bytes
-    output = io.BytesIO()
-    wb.save(output)
+        ws.write(row_idx, 0, "Total Estimated Value:")
+        ws.write_number(row_idx, 1, round(results_summary['total_value'], 2), money_fmt)
+
+    wb.close()
     output.seek(0)
-    
+
     # Return as downloadable file
     # Ensure output is always .xlsx (even if input was .xls)
-    base_filename = file.filename or "estimate"
+    base_filename = upload_filename or "estimate"
     if base_filename.lower().endswith('.xls') and not base_filename.lower().endswith('.xlsx'):
         base_filename = base_filename[:-4] + '.xlsx'
     elif not base_filename.lower().endswith('.xlsx'):
         base_filename = base_filename + '.xlsx'
     filename = f"priced_{base_filename}"
+
+    return output, filename, results_summary
+
+
+@router.post("/estimator/price-items")
+@limiter.limit("10/minute")
+async def price_items_from_excel(
+    request: Request,
+    file: UploadFile = File(...),
+    districts: str = Form(default=""),
+    year_start: Optional[int] = Form(default=None),
+    year_end: Optional[int] = Form(default=None)
+):
+    """
+    Upload an Excel file with item numbers and quantities.
+    Returns the file with weighted average prices filled in.
+    
+    PRO FEATURE - requires active subscription.
+    
+    Expected Excel format:
+    - Column A: Item Number (required)
+    - Column B: Item Description (will be filled if empty)
+    - Column C: Quantity (required for extension calc)
+    - Column D: Unit (will be filled if empty)
+    - Column E: Unit Price (will be filled by system)
+    - Column F: Extension (will be calculated)
     
+    Limited to 300 items to prevent bulk data extraction.
+    """
+    # Check if user has Pro access
+    user = get_current_user(request)
+    if not user:
+        raise HTTPException(
+            status_code=401, 
+            detail="Please log in to use the Estimator Tool"
+        )
+    
+    limits = get_user_limits(user)
+    if not limits['estimator_access']:
+        raise HTTPException(
+            status_code=403, 
+            detail="The Estimator Tool requires a Pro subscription. Start your 7-day free trial today!"
+        )
+    
+    from tempfile import SpooledTemporaryFile
+
+    # Spool the upload into a bounded buffer in 64KB chunks rather than
+    # buffering the whole body with file.read() - a client that streams an
+    # oversized body (with or without Content-Length) is cut off at the cap
+    max_upload_bytes = 8 * 1024 * 1024
+    spool = SpooledTemporaryFile(max_size=2 << 20)
+    received = 0
+    while True:
+        chunk = await file.read(65536)
+        if not chunk:
+            break
+        received += len(chunk)
+        if received > max_upload_bytes:
+            raise HTTPException(status_code=413, detail="Uploaded file exceeds the 8MB limit.")
+        spool.write(chunk)
+    spool.seek(0)
+
+    # openpyxl parsing and workbook serialization are CPU-bound; run them
+    # in a worker thread so one slow estimator request doesn't stall every
+    # other request behind the event loop
+    output, filename, results_summary = await run_in_threadpool(
+        _build_priced_xlsx, spool, file.filename, districts, year_start, year_end
+    )
+
     return StreamingResponse(
-        output,
+        # Fixed-size chunks; iterating the BytesIO directly would split the
+        # binary payload on newline bytes
+        iter(lambda: output.read(65536), b""),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={
             "Content-Disposition": f"attachment; filename={filename}",
@@ -1739,30 +2249,25 @@ async def price_items_from_excel(
     )
 
 
-@router.get("/estimator/template")
-@limiter.limit("10/minute")
-async def get_estimator_template(request: Request):
-    """
-    Download a blank template Excel file for the estimator tool.
-    """
+def _build_template_xlsx() -> bytes:
+    """Build the blank estimator template workbook (CPU-bound openpyxl work)"""
     import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment
-    
+
+    styles = _xlsx_styles()
+
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "Estimate Items"
-    
+
     # Headers
     headers = ['Item Number', 'Description', 'Quantity', 'Unit', 'Market Avg', 'Filtered Avg', 'Extension', 'Bid Count', 'Source']
-    header_fill = PatternFill(start_color="1E3A5F", end_color="1E3A5F", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    
+
     for col, header in enumerate(headers, 1):
         cell = ws.cell(row=1, column=col)
         cell.value = header
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
+        cell.fill = styles['header_fill']
+        cell.font = styles['header_font']
+        cell.alignment = styles['header_alignment']
     
     # Example rows
     examples = [
@@ -1770,20 +2275,21 @@ async def get_estimator_template(request: Request):
         ('60105100', '', 500, 'TON', '', '', ''),
         ('78004000', '', 200, 'LIN FT', '', '', ''),
     ]
-    
-    for row_num, example in enumerate(examples, 2):
-        for col_num, value in enumerate(example, 1):
-            ws.cell(row=row_num, column=col_num).value = value if value else None
-    
+
+    for example in examples:
+        ws.append([value if value else None for value in example])
+
     # Instructions
-    ws.cell(row=7, column=1).value = "Instructions:"
-    ws.cell(row=7, column=1).font = Font(bold=True)
-    ws.cell(row=8, column=1).value = "1. Enter IDOT item numbers in Column A"
-    ws.cell(row=9, column=1).value = "2. Enter quantities in Column C"
-    ws.cell(row=10, column=1).value = "3. Upload this file to get weighted average prices"
-    ws.cell(row=11, column=1).value = "4. Maximum 300 items per upload"
-    ws.cell(row=12, column=1).value = "5. Market Avg = all data, Filtered Avg = with your filters"
-    ws.cell(row=13, column=1).value = "6. Yellow highlighted cells = no filtered data, using market avg"
+    ws.append([])
+    ws.append([])
+    ws.append(["Instructions:"])
+    ws.cell(row=7, column=1).font = styles['bold_font']
+    ws.append(["1. Enter IDOT item numbers in Column A"])
+    ws.append(["2. Enter quantities in Column C"])
+    ws.append(["3. Upload this file to get weighted average prices"])
+    ws.append(["4. Maximum 300 items per upload"])
+    ws.append(["5. Market Avg = all data, Filtered Avg = with your filters"])
+    ws.append(["6. Yellow highlighted cells = no filtered data, using market avg"])
     
     # Adjust column widths
     ws.column_dimensions['A'].width = 15
@@ -1799,12 +2305,38 @@ async def get_estimator_template(request: Request):
     # Save to bytes
     output = io.BytesIO()
     wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
+
+    return output.getvalue()
+
+
+@lru_cache(maxsize=1)
+def _template_bytes() -> bytes:
+    """The blank template blob - deterministic, so it is built exactly once"""
+    return _build_template_xlsx()
+
+
+@router.get("/estimator/template")
+@limiter.limit("10/minute")
+async def get_estimator_template(request: Request):
+    """
+    Download a blank template Excel file for the estimator tool.
+    """
+    # Built on first request and served from memory afterwards; the ETag
+    # lets browsers revalidate and skip the body entirely
+    data = await run_in_threadpool(_template_bytes)
+    etag = f'"{hashlib.md5(data).hexdigest()}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+
+    return Response(
+        content=data,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=estimator_template.xlsx"}
+        headers={
+            "Content-Disposition": "attachment; filename=estimator_template.xlsx",
+            **cache_headers,
+        }
     )
 
 
@@ -7,7 +7,7 @@ import stripe
 import os
 from datetime import datetime
 
-from app.api.users import get_user_by_id, update_user, get_user_by_token
+from app.api.users import get_user_by_id, get_user_db, update_user, get_user_by_token
 from app.api.auth import get_current_user
 
 router = APIRouter()
@@ -140,31 +140,37 @@ async def stripe_webhook(request: Request):
     return {"status": "success"}
 
 
+def _user_id_by_customer(conn, customer_id):
+    """Look up a user id by Stripe customer ID on an existing connection"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM users WHERE stripe_customer_id = ?", [customer_id])
+    row = cursor.fetchone()
+    return row['id'] if row else None
+
+
 def handle_checkout_completed(session):
     """Handle successful checkout"""
     customer_id = session.get("customer")
     subscription_id = session.get("subscription")
     
-    # Find user by Stripe customer ID
-    from app.api.users import get_user_db
+    # One connection for the lookup and the update
     conn = get_user_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE stripe_customer_id = ?", [customer_id])
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        # Get subscription details
-        subscription = stripe.Subscription.retrieve(subscription_id)
-        end_date = datetime.fromtimestamp(subscription.current_period_end).isoformat()
-        
+    user_id = _user_id_by_customer(conn, customer_id)
+    
+    if user_id:
+        # No stripe.Subscription.retrieve here - that is an outbound HTTPS
+        # round trip on the webhook critical path. Stripe fires a
+        # customer.subscription.updated event moments after checkout, and
+        # handle_subscription_updated fills in subscription_end_date from
+        # that payload.
         update_user(
-            row['id'],
+            user_id,
+            conn=conn,
             tier='pro',
             stripe_subscription_id=subscription_id,
-            subscription_status='active',
-            subscription_end_date=end_date
+            subscription_status='active'
         )
+    conn.close()
 
 
 def handle_subscription_updated(subscription):
@@ -172,66 +178,57 @@ def handle_subscription_updated(subscription):
     customer_id = subscription.get("customer")
     status = subscription.get("status")
     
-    # Find user
-    from app.api.users import get_user_db
     conn = get_user_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE stripe_customer_id = ?", [customer_id])
-    row = cursor.fetchone()
-    conn.close()
+    user_id = _user_id_by_customer(conn, customer_id)
     
-    if row:
+    if user_id:
         tier = 'pro' if status in ['active', 'trialing'] else 'free'
         end_date = None
         if subscription.get("current_period_end"):
             end_date = datetime.fromtimestamp(subscription["current_period_end"]).isoformat()
         
         update_user(
-            row['id'],
+            user_id,
+            conn=conn,
             tier=tier,
             subscription_status=status,
             subscription_end_date=end_date
         )
+    conn.close()
 
 
 def handle_subscription_deleted(subscription):
     """Handle subscription cancellation"""
     customer_id = subscription.get("customer")
     
-    # Find user
-    from app.api.users import get_user_db
     conn = get_user_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE stripe_customer_id = ?", [customer_id])
-    row = cursor.fetchone()
-    conn.close()
+    user_id = _user_id_by_customer(conn, customer_id)
     
-    if row:
+    if user_id:
         update_user(
-            row['id'],
+            user_id,
+            conn=conn,
             tier='free',
             subscription_status='cancelled',
             stripe_subscription_id=None
         )
+    conn.close()
 
 
 def handle_payment_failed(invoice):
     """Handle failed payment"""
     customer_id = invoice.get("customer")
     
-    # Find user
-    from app.api.users import get_user_db
     conn = get_user_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id FROM users WHERE stripe_customer_id = ?", [customer_id])
-    row = cursor.fetchone()
-    conn.close()
+    user_id = _user_id_by_customer(conn, customer_id)
     
-    if row:
+    if user_id:
         update_user(
-            row['id'],
+            user_id,
+            conn=conn,
             subscription_status='past_due'
         )
+    conn.close()
 
 
 @router.get("/subscription-status")
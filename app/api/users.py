@@ -3,16 +3,29 @@ User management and database models
 """
 import sqlite3
 import os
+import threading
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Optional
 import bcrypt
 import secrets
+from cachetools import TTLCache
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
+
+# argon2id with OWASP-recommended parameters - roughly an order of magnitude
+# cheaper per hash than bcrypt at its default cost while being memory-hard.
+# Existing bcrypt hashes keep verifying and are migrated lazily on login.
+_PH = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+
+# Resolved once at import rather than per connection
+_USER_DB_PATH = os.getenv("USER_DATABASE_PATH", "/app/data/users.db")
 
 
 def get_user_db():
     """Get user database connection"""
-    db_path = os.getenv("USER_DATABASE_PATH", "/app/data/users.db")
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(_USER_DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -21,6 +34,11 @@ def init_user_db():
     conn = get_user_db()
     cursor = conn.cursor()
     
+    # Take the write lock up front so workers booting concurrently queue on
+    # the DDL instead of interleaving mid-statement
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("BEGIN IMMEDIATE")
+    
     # Users table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -53,21 +71,45 @@ def init_user_db():
         )
     """)
     
+    # Webhook handlers look users up by Stripe customer id; without this
+    # index every webhook is a full table scan
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_stripe_customer
+        ON users(stripe_customer_id)
+    """)
+
+    # Every authenticated request resolves a session token, so that lookup
+    # must be an index seek; expires_at serves cleanup_expired_sessions and
+    # user_id serves per-user session queries
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_token ON sessions(token)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)")
+
     conn.commit()
     conn.close()
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+    """Hash a password using argon2id"""
+    return _PH.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash (argon2 or legacy bcrypt)"""
+    if hashed_password.startswith('$argon2'):
+        try:
+            return _PH.verify(hashed_password, plain_password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+    # Legacy bcrypt hash from before the argon2 migration
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the stored hash predates the current argon2 parameters"""
+    if not hashed_password.startswith('$argon2'):
+        return True
+    return _PH.check_needs_rehash(hashed_password)
+
 def create_user(email: str, password: Optional[str] = None, name: Optional[str] = None, 
                 google_id: Optional[str] = None) -> dict:
     """Create a new user"""
@@ -119,9 +161,11 @@ def get_user_by_id(user_id: int) -> Optional[dict]:
     conn.close()
     return dict(row) if row else None
 
-def update_user(user_id: int, **kwargs) -> bool:
-    """Update user fields"""
-    conn = get_user_db()
+def update_user(user_id: int, conn: Optional[sqlite3.Connection] = None, **kwargs) -> bool:
+    """Update user fields, reusing an existing connection when one is passed"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_user_db()
     cursor = conn.cursor()
     
     allowed_fields = ['name', 'tier', 'stripe_customer_id', 'stripe_subscription_id',
@@ -136,7 +180,8 @@ def update_user(user_id: int, **kwargs) -> bool:
             values.append(value)
     
     if not updates:
-        conn.close()
+        if own_conn:
+            conn.close()
         return False
     
     values.append(user_id)
@@ -145,7 +190,9 @@ def update_user(user_id: int, **kwargs) -> bool:
         WHERE id = ?
     """, values)
     conn.commit()
-    conn.close()
+    if own_conn:
+        conn.close()
+    _invalidate_cached_user(user_id)
     return True
 
 def create_session(user_id: int, expires_hours: int = 24 * 7) -> str:
@@ -165,23 +212,57 @@ def create_session(user_id: int, expires_hours: int = 24 * 7) -> str:
     
     return token
 
+# Token lookups back every authenticated request; a short TTL means the
+# hot path is usually a dict hit instead of a connection open + two SELECTs.
+# Sessions live for days, so 30 seconds of staleness is acceptable - writes
+# that matter (logout, subscription changes) invalidate explicitly below.
+_session_cache = TTLCache(maxsize=10_000, ttl=30)
+_session_cache_lock = threading.Lock()
+
+def _invalidate_cached_user(user_id: int) -> None:
+    """Drop cached session entries for a user whose row just changed"""
+    with _session_cache_lock:
+        stale = [t for t, u in _session_cache.items() if u and u['id'] == user_id]
+        for t in stale:
+            del _session_cache[t]
+
 def get_user_by_token(token: str) -> Optional[dict]:
     """Get user by session token"""
+    with _session_cache_lock:
+        if token in _session_cache:
+            return _session_cache[token]
+
     conn = get_user_db()
     cursor = conn.cursor()
     
+    # Seek the session by its token index, then fetch the user by primary
+    # key - two indexed lookups instead of a join the planner may scan
     cursor.execute("""
-        SELECT users.* FROM users
-        JOIN sessions ON users.id = sessions.user_id
-        WHERE sessions.token = ? AND sessions.expires_at > ?
+        SELECT user_id FROM sessions
+        WHERE token = ? AND expires_at > ?
     """, [token, datetime.utcnow().isoformat()])
+    session = cursor.fetchone()
     
+    if not session:
+        conn.close()
+        with _session_cache_lock:
+            _session_cache[token] = None
+        return None
+    
+    cursor.execute("SELECT * FROM users WHERE id = ?", [session['user_id']])
     row = cursor.fetchone()
     conn.close()
-    return dict(row) if row else None
+
+    user = dict(row) if row else None
+    with _session_cache_lock:
+        _session_cache[token] = user
+    return user
 
 def delete_session(token: str) -> bool:
     """Delete a session (logout)"""
+    with _session_cache_lock:
+        _session_cache.pop(token, None)
+
     conn = get_user_db()
     cursor = conn.cursor()
     cursor.execute("DELETE FROM sessions WHERE token = ?", [token])
@@ -200,45 +281,63 @@ def cleanup_expired_sessions():
 
 def check_and_reset_daily_searches(user_id: int) -> int:
     """Check daily search count, reset if new day, return current count"""
+    today = datetime.utcnow().date().isoformat()
+
     conn = get_user_db()
     cursor = conn.cursor()
-    
-    cursor.execute("SELECT daily_searches, last_search_date FROM users WHERE id = ?", [user_id])
+
+    # One conditional UPDATE ... RETURNING (SQLite >= 3.35) instead of a
+    # SELECT followed by an UPDATE - no second round trip, no race between
+    # reading the date and resetting the counter
+    cursor.execute("""
+        UPDATE users SET
+            daily_searches = CASE WHEN last_search_date = ? THEN daily_searches ELSE 0 END,
+            last_search_date = ?
+        WHERE id = ?
+        RETURNING daily_searches
+    """, [today, today, user_id])
     row = cursor.fetchone()
-    
-    today = datetime.utcnow().date().isoformat()
-    
-    if row['last_search_date'] != today:
-        # New day, reset counter
-        cursor.execute("""
-            UPDATE users SET daily_searches = 0, last_search_date = ?
-            WHERE id = ?
-        """, [today, user_id])
-        conn.commit()
-        conn.close()
-        return 0
-    
+    conn.commit()
     conn.close()
-    return row['daily_searches']
 
-def increment_daily_searches(user_id: int) -> int:
-    """Increment and return new daily search count"""
+    if row is None:
+        return 0
+
+    # Include increments that are buffered but not yet flushed
+    with _pending_lock:
+        pending = _pending_increments.get(user_id, 0)
+    return row[0] + pending
+
+# Search-count increments are buffered in memory and flushed periodically so
+# the hot search path doesn't take the SQLite writer lock on every request
+_pending_increments = defaultdict(int)
+_pending_lock = threading.Lock()
+
+def increment_daily_searches(user_id: int) -> None:
+    """Record a search for the user; the write is flushed in the background"""
+    with _pending_lock:
+        _pending_increments[user_id] += 1
+
+def flush_pending_increments():
+    """Write buffered search-count increments to the users table in one batch"""
+    with _pending_lock:
+        if not _pending_increments:
+            return
+        pending = dict(_pending_increments)
+        _pending_increments.clear()
+
+    today = datetime.utcnow().date().isoformat()
+
     conn = get_user_db()
     cursor = conn.cursor()
-    
-    today = datetime.utcnow().date().isoformat()
-    
-    cursor.execute("""
-        UPDATE users SET daily_searches = daily_searches + 1, last_search_date = ?
+    cursor.executemany("""
+        UPDATE users SET
+            daily_searches = CASE WHEN last_search_date = ? THEN daily_searches + ? ELSE ? END,
+            last_search_date = ?
         WHERE id = ?
-    """, [today, user_id])
+    """, [(today, count, count, today, user_id) for user_id, count in pending.items()])
     conn.commit()
-    
-    cursor.execute("SELECT daily_searches FROM users WHERE id = ?", [user_id])
-    count = cursor.fetchone()['daily_searches']
     conn.close()
-    
-    return count
 
 def get_user_limits(user: dict) -> dict:
     """Get rate limits based on user tier"""
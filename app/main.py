@@ -2,26 +2,76 @@
 Unit Price Intelligence Platform - Main Application
 FastAPI backend with security hardening and user authentication
 """
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Import API routes
 from app.api import routes
 from app.api import auth
 from app.api import stripe_routes
-from app.api.users import init_user_db
+from app.api.routes import ORJSONResponse, ensure_bids_schema, close_db_pool
+from app.api.users import init_user_db, flush_pending_increments
+
+# Deployment specialization, decided once at import rather than per request:
+# optional subsystems can be switched off per environment (load tests,
+# local dev) without editing code or keeping divergent main.py variants
+ENABLE_RATE_LIMIT = os.getenv("ENABLE_RATE_LIMIT", "true").lower() == "true"
+ENABLE_AUTH = os.getenv("ENABLE_AUTH", "true").lower() == "true"
 
 # Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address, default_limits=["200 per minute"])
+# Point RATE_LIMIT_STORAGE_URI at Redis (redis://host:6379) in multi-worker
+# deployments so all workers enforce one shared quota; the in-process default
+# gives each worker its own counters. moving-window avoids the fixed-window
+# burst at interval boundaries.
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=["200 per minute"],
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+)
+
+logger = logging.getLogger(__name__)
+
+# Flush buffered search-count increments every couple of seconds so the
+# search endpoints never pay for a synchronous UPDATE. The flush takes the
+# SQLite write lock, so it runs in the threadpool rather than on the event
+# loop, and a failed flush (e.g. database locked) is logged and retried on
+# the next tick instead of killing the task.
+async def _flush_increments_loop():
+    while True:
+        await asyncio.sleep(2)
+        try:
+            await run_in_threadpool(flush_pending_increments)
+        except Exception:
+            logger.exception("Failed to flush search-count increments")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Both init calls are idempotent CREATE IF NOT EXISTS-style DDL, safe
+    # when several gunicorn workers boot against the same files
+    init_user_db()
+    ensure_bids_schema()
+    flusher = asyncio.create_task(_flush_increments_loop())
+    yield
+    flusher.cancel()
+    flush_pending_increments()
+    close_db_pool()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -30,21 +80,31 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs" if os.getenv("ENABLE_DOCS", "false").lower() == "true" else None,
     redoc_url="/redoc" if os.getenv("ENABLE_DOCS", "false").lower() == "true" else None,
+    lifespan=lifespan,
+    # orjson serialization for every JSON endpoint, including routes added
+    # directly on the app (the API router already sets this for its own)
+    default_response_class=ORJSONResponse,
 )
 
-# Initialize user database on startup
-@app.on_event("startup")
-async def startup_event():
-    init_user_db()
-
 # Add rate limiter to app state and middleware
 app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
+if ENABLE_RATE_LIMIT:
+    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_middleware(SlowAPIMiddleware)
+else:
+    # Also neutralizes the per-route @limiter.limit decorators
+    limiter.enabled = False
+    routes.limiter.enabled = False
 
-# CORS middleware - restrict to your domain in production
-allowed_origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
-if not allowed_origins or allowed_origins == [""]:
+# CORS middleware - restrict to your domain in production.
+# Filter out empty entries so ALLOWED_ORIGINS="" (or a stray trailing comma)
+# can't leave "" in the allowlist or silently defeat the default fallback.
+allowed_origins = [
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "").split(",")
+    if origin.strip()
+]
+if not allowed_origins:
     allowed_origins = [
         "https://idot-platform.onrender.com",
         "https://apparentlow.io",
@@ -61,57 +121,191 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    return response
-
-# Request size limiting middleware
-@app.middleware("http")
-async def limit_request_size(request: Request, call_next):
-    content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > 10 * 1024 * 1024:
-        return JSONResponse(
-            status_code=413,
-            content={"detail": "Request too large. Maximum 10MB allowed."}
-        )
-    return await call_next(request)
+# Compress JSON/HTML responses - search results and analytics payloads are
+# highly repetitive text, so this cuts transfer size several-fold; tiny
+# responses stay uncompressed via minimum_size
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Security-headers and request-size middleware as plain ASGI callables.
+# The @app.middleware("http") path goes through BaseHTTPMiddleware, which
+# spawns an extra task and pipes the body through an anyio stream on every
+# request; these touch the raw messages instead.
+_SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+
+class SecurityHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                # Build a fresh message/header list rather than mutating in
+                # place - cached responses share their header structures
+                message = {
+                    **message,
+                    "headers": [*message["headers"], *_SECURITY_HEADERS],
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+MAX_REQUEST_BYTES = 10 * 1024 * 1024
+
+class _RequestTooLarge(Exception):
+    pass
+
+class RequestSizeLimitMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Honest clients are rejected up front from the declared length
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > MAX_REQUEST_BYTES:
+                    response = ORJSONResponse(
+                        status_code=413,
+                        content={"detail": "Request too large. Maximum 10MB allowed."}
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+
+        # A client can omit or understate Content-Length and stream an
+        # arbitrarily large body, so the cap is also enforced on the bytes
+        # actually received
+        received = 0
+        response_started = False
+        limit_hit = False
+
+        async def limited_receive():
+            nonlocal received, limit_hit
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > MAX_REQUEST_BYTES:
+                    if response_started:
+                        # Headers already on the wire - nothing left but to
+                        # tear the connection down
+                        raise _RequestTooLarge()
+                    # Send the 413 from here: an exception raised out of
+                    # receive() during body parsing is swallowed by the
+                    # framework's own error handling and resurfaces as a 400.
+                    # Then present a disconnect so the app unwinds quietly;
+                    # tracking_send drops whatever response it still emits.
+                    limit_hit = True
+                    response = ORJSONResponse(
+                        status_code=413,
+                        content={"detail": "Request too large. Maximum 10MB allowed."}
+                    )
+                    await response(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if limit_hit:
+                # The 413 already went out; swallow the app's reaction to
+                # the synthetic disconnect
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, tracking_send)
+
+app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(RequestSizeLimitMiddleware)
 
 # Include API routes
 app.include_router(routes.router, prefix="/api")
-app.include_router(auth.router, prefix="/api/auth")
-app.include_router(stripe_routes.router, prefix="/api/stripe")
+if ENABLE_AUTH:
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(stripe_routes.router, prefix="/api/stripe")
+
+# Static assets get a year-long immutable cache lifetime - their bytes only
+# change when the file (and thus the URL clients fetch) changes on deploy,
+# so browsers never need to re-request or even revalidate them
+class CachedStaticFiles(StaticFiles):
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+if STATIC_DIR.is_dir():
+    app.mount("/static", CachedStaticFiles(directory=str(STATIC_DIR)), name="static")
 
-# Setup templates
+# Page templates are static HTML - read each once, cache the body and its
+# ETag, and skip the per-request Jinja lookup/render entirely. Browsers
+# holding the current version get an empty 304.
 BASE_DIR = Path(__file__).resolve().parent.parent
-templates = Jinja2Templates(directory=str(BASE_DIR / "app" / "templates"))
+TEMPLATES_DIR = BASE_DIR / "app" / "templates"
 
-# Root route - serve main page
+_page_cache = {}
+
+def _page_response(request: Request, template_name: str) -> Response:
+    entry = _page_cache.get(template_name)
+    if entry is None:
+        body = (TEMPLATES_DIR / template_name).read_text(encoding="utf-8")
+        etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+        entry = _page_cache[template_name] = (body, etag)
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+# The cached pages and the health probe are exempt from the default rate
+# limit: they serve pre-built bytes, so limiting buys no protection and the
+# exemption skips slowapi's per-request limit evaluation and storage hit
 @app.get("/")
+@limiter.exempt
 async def root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return _page_response(request, "index.html")
 
 # Pricing page
 @app.get("/pricing")
+@limiter.exempt
 async def pricing(request: Request):
-    return templates.TemplateResponse("pricing.html", {"request": request})
+    return _page_response(request, "pricing.html")
 
 # Terms of Service page
 @app.get("/terms")
+@limiter.exempt
 async def terms(request: Request):
-    return templates.TemplateResponse("terms.html", {"request": request})
+    return _page_response(request, "terms.html")
 
 # Privacy Policy page
 @app.get("/privacy")
+@limiter.exempt
 async def privacy(request: Request):
-    return templates.TemplateResponse("privacy.html", {"request": request})
+    return _page_response(request, "privacy.html")
+
+# Health check (not rate limited). Monitors hit this constantly, so the
+# serialized body is a constant - but the Response itself is built per
+# request, because middleware (GZipMiddleware in particular) mutates
+# response headers in place and a shared object would accumulate them.
+_HEALTH_BODY = b'{"status":"healthy"}'
 
-# Health check (not rate limited)
 @app.get("/health")
+@limiter.exempt
 async def health():
-    return {"status": "healthy"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")